@@ -5,10 +5,91 @@ Author: tperera
 Date: 2025-11-23
 License: MIT
 """
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from numba import njit, prange
+
+
+@njit
+def _metrics(r):
+    """
+    Single pass over a float64 return array for the performance panel.
+    
+    NaN returns are skipped like the pandas reductions they replace.
+    
+    Returns:
+        Tuple of (total_return, variance, max_drawdown, wins,
+        gross_profit, gross_loss, count of valid returns)
+    """
+    count, mean, m2 = 0, 0.0, 0.0
+    cumlog, peak, max_dd = 0.0, -np.inf, 0.0
+    wins, gross_profit, gross_loss = 0, 0.0, 0.0
+    for i in range(r.shape[0]):
+        ri = r[i]
+        if ri != ri:
+            continue
+        # Welford variance
+        count += 1
+        delta = ri - mean
+        mean += delta / count
+        m2 += delta * (ri - mean)
+        # Compound in log space; drawdown from the running log peak. A loss
+        # of 100% or more wipes the equity out (log1p would give NaN below -1)
+        cumlog += np.log1p(ri) if ri > -1.0 else -np.inf
+        if cumlog == -np.inf:
+            # Wiped out, even on the first bar where peak is still -inf
+            max_dd = -1.0
+        else:
+            peak = max(peak, cumlog)
+            max_dd = min(max_dd, np.expm1(cumlog - peak))
+        if ri > 0:
+            wins += 1
+            gross_profit += ri
+        elif ri < 0:
+            gross_loss -= ri
+    variance = m2 / (count - 1) if count > 1 else np.nan
+    if count == 0:
+        max_dd = np.nan
+    return np.expm1(cumlog), variance, max_dd, wins, gross_profit, gross_loss, count
+
+
+@njit(parallel=True)
+def _sweep_stats(signal, returns_a, returns_b, hedge_ratio, position_size, transaction_cost):
+    """
+    _metrics of the backtest returns of every column of a (T, P) signal grid.
+    
+    Column j earns signal[t-1, j] * position_size * (hedge_ratio * returns_b[t]
+    - returns_a[t]) and pays transaction_cost per unit change in signal,
+    matching Backtester.run_backtest on already aligned inputs.
+    
+    Returns:
+        (P, 7) array, one _metrics tuple per column
+    """
+    n, p = signal.shape
+    stats = np.empty((p, 7), dtype=np.float64)
+    for j in prange(p):
+        r = np.empty(n, dtype=np.float64)
+        if n > 0:
+            r[0] = np.nan
+        for t in range(1, n):
+            prev = signal[t - 1, j]
+            r[t] = (prev * position_size * (hedge_ratio * returns_b[t] - returns_a[t])
+                    - abs(signal[t, j] - prev) * transaction_cost)
+        total, variance, max_dd, wins, gross_profit, gross_loss, count = _metrics(r)
+        stats[j, 0] = total
+        stats[j, 1] = variance
+        stats[j, 2] = max_dd
+        stats[j, 3] = wins
+        stats[j, 4] = gross_profit
+        stats[j, 5] = gross_loss
+        stats[j, 6] = count
+    return stats
+
+
+# Single worker so queued figure saves never compete for the renderer
+_SAVE_EXECUTOR = ThreadPoolExecutor(max_workers=1)
+
 
 class Backtester:
     """Runs backtest given strategy, data, and signals"""
@@ -58,57 +139,114 @@ class Backtester:
             - 'positions': Position sizes
             - 'trades': Entry/exit points
         """
-        # Calculate returns
-        returns_a = prices_a.pct_change()
-        returns_b = prices_b.pct_change()
-        
-        # Align everything
-        aligned_data = pd.DataFrame({
-            'signal': signals,
-            'return_a': returns_a,
-            'return_b': returns_b
-        }).dropna()
+        index, signal, returns_a, returns_b = self._aligned_arrays(prices_a, prices_b, signals)
+        n = len(signal)
         
         # Calculate positions (dollar amount in each stock)
         # When signal = 1 (long spread): long B, short A
         # When signal = -1 (short spread): short B, long A
         position_value = self.initial_capital * self.max_position_size
         
-        positions_a = -aligned_data['signal'] * position_value
-        positions_b = aligned_data['signal'] * position_value * hedge_ratio
+        positions_a = -signal * position_value
+        positions_b = signal * position_value * hedge_ratio
 
-        # Calculate portfolio returns
-        portfolio_returns_abs = (
-            positions_a.shift(1) * aligned_data['return_a'] +
-            positions_b.shift(1) * aligned_data['return_b']
-         ) 
+        # Calculate portfolio returns from the previous bar's positions
+        portfolio_returns_abs = np.full(n, np.nan)
+        portfolio_returns_abs[1:] = positions_a[:-1] * returns_a[1:] + positions_b[:-1] * returns_b[1:]
         
         portfolio_returns = portfolio_returns_abs / self.initial_capital
         
         # Apply transaction costs
-        position_changes = aligned_data['signal'].diff().abs()
+        signal_changes = np.diff(signal, prepend=np.nan)
+        position_changes = np.abs(signal_changes)
 
-        total_traded = positions_a.diff().abs() + positions_b.diff().abs()
+        total_traded = (np.abs(np.diff(positions_a, prepend=np.nan)) +
+                        np.abs(np.diff(positions_b, prepend=np.nan)))
         transaction_costs = position_changes * self.transaction_cost
-        total_transaction_costs =  total_traded * self.transaction_cost
+        total_transaction_costs = total_traded * self.transaction_cost
         portfolio_returns -= transaction_costs
         
-        # Calculate equity curve
-        equity = self.initial_capital * (1 + portfolio_returns).cumprod()
+        # Calculate equity curve (first bar has no return yet)
+        equity = np.full(n, np.nan)
+        equity[1:] = self.initial_capital * np.cumprod(1 + portfolio_returns[1:])
         
         # Track trades
-        trades = aligned_data['signal'].diff()
-        trade_dates = trades[trades != 0].index
+        trade_dates = index[signal_changes != 0]
         
         return {
-            'equity': equity,
-            'returns': portfolio_returns,
-            'returns_abs': portfolio_returns_abs,
-            'transaction_costs' : total_transaction_costs,
-            'positions_a': positions_a,
-            'positions_b': positions_b,
+            'equity': pd.Series(equity, index=index),
+            'returns': pd.Series(portfolio_returns, index=index),
+            'returns_abs': pd.Series(portfolio_returns_abs, index=index),
+            'transaction_costs' : pd.Series(total_transaction_costs, index=index),
+            'positions_a': pd.Series(positions_a, index=index),
+            'positions_b': pd.Series(positions_b, index=index),
             'trades': trade_dates
         }
+
+    def _aligned_arrays(self, prices_a, prices_b, signals):
+        """Signals and both return series as ndarrays on their common valid bars"""
+        # Calculate returns
+        returns_a = self._pct_change(prices_a)
+        returns_b = self._pct_change(prices_b)
+        signal = np.asarray(signals, dtype=np.float64)
+        
+        # Align everything, reindexing only when the inputs disagree
+        index = signals.index
+        if not (index.equals(prices_a.index) and index.equals(prices_b.index)):
+            index = index.union(prices_a.index).union(prices_b.index)
+            signal = signals.reindex(index).to_numpy(dtype=np.float64)
+            returns_a = pd.Series(returns_a, index=prices_a.index).reindex(index).to_numpy()
+            returns_b = pd.Series(returns_b, index=prices_b.index).reindex(index).to_numpy()
+        missing = np.isnan(signal) if signal.ndim == 1 else np.isnan(signal).any(axis=1)
+        valid = ~(missing | np.isnan(returns_a) | np.isnan(returns_b))
+        return index[valid], signal[valid], returns_a[valid], returns_b[valid]
+
+    def run_sweep(self, prices_a, prices_b, signals, hedge_ratio):
+        """
+        Backtest every column of a signal grid and score each one.
+        
+        Each column is run like run_backtest and scored like
+        calculate_performance_metrics, in a compiled loop that runs the
+        columns in parallel without building per-column equity series.
+        
+        Args:
+            prices_a: Price series for stock A
+            prices_b: Price series for stock B
+            signals: DataFrame of signals, one column per parameter set
+                (e.g. from PairsTradingStrategy.sweep_signals)
+            hedge_ratio: Hedge ratio for position sizing
+        
+        Returns:
+            DataFrame of performance metrics indexed like signals.columns
+        """
+        _, signal, returns_a, returns_b = self._aligned_arrays(prices_a, prices_b, signals)
+        stats = _sweep_stats(
+            np.ascontiguousarray(signal), returns_a, returns_b, float(hedge_ratio),
+            float(self.max_position_size), float(self.transaction_cost)
+        )
+        total_return, variance, max_drawdown, wins, gross_profit, gross_loss, _ = stats.T
+        n_days = len(signal)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            annual_return = (1 + total_return) ** (252 / n_days) - 1
+            annual_vol = np.sqrt(variance) * np.sqrt(252)
+            return pd.DataFrame({
+                'Total Return': total_return,
+                'Annual Return': annual_return,
+                'Annual Volatility': annual_vol,
+                'Sharpe Ratio': np.where(annual_vol != 0, annual_return / annual_vol, 0),
+                'Max Drawdown': max_drawdown,
+                'Win Rate': wins / n_days,
+                'Profit Factor': np.where(gross_loss != 0, gross_profit / gross_loss, np.inf),
+                'Calmar Ratio': np.where(max_drawdown != 0, annual_return / np.abs(max_drawdown), 0)
+            }, index=signals.columns)
+
+    @staticmethod
+    def _pct_change(prices):
+        """Simple returns as an ndarray, NaN on the first bar"""
+        values = np.asarray(prices, dtype=np.float64)
+        returns = np.full(len(values), np.nan)
+        returns[1:] = values[1:] / values[:-1] - 1
+        return returns
     
     def calculate_performance_metrics(self, returns):
         """
@@ -130,32 +268,24 @@ class Backtester:
         Returns:
             Dictionary of performance metrics
         """
-        # Total return
-        total_return = (1 + returns).prod() - 1
+        r = np.ascontiguousarray(returns, dtype=np.float64)
+        total_return, variance, max_drawdown, wins, gross_profit, gross_loss, _ = _metrics(r)
         
         # Annualized return (assuming 252 trading days)
-        n_days = len(returns)
+        n_days = len(r)
         n_years = n_days / 252
         annual_return = (1 + total_return) ** (1 / n_years) - 1
         
         # Annual volatility
-        annual_vol = returns.std() * np.sqrt(252)
+        annual_vol = np.sqrt(variance) * np.sqrt(252)
         
         # Sharpe ratio (assuming 0% risk-free rate)
         sharpe_ratio = annual_return / annual_vol if annual_vol != 0 else 0
         
-        # Maximum drawdown
-        cumulative = (1 + returns).cumprod()
-        running_max = cumulative.expanding().max()
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown = drawdown.min()
-        
         # Win rate
-        win_rate = (returns > 0).sum() / len(returns)
+        win_rate = wins / n_days
         
         # Profit factor
-        gross_profit = returns[returns > 0].sum()
-        gross_loss = abs(returns[returns < 0].sum())
         profit_factor = gross_profit / gross_loss if gross_loss != 0 else np.inf
         
         # Calmar ratio
@@ -185,7 +315,17 @@ class Backtester:
         4. Z-score with threshold lines
         5. Returns distribution
         6. Rolling Sharpe ratio
+        
+        With a non-interactive backend (e.g. Agg) the figure is saved on a
+        background thread and the returned future resolves once the PNG
+        is written; otherwise the figure is saved and shown inline and
+        None is returned.
         """
+        # Imported here so headless backtests and sweep workers skip them
+        import bottleneck as bn
+        import matplotlib
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
         
         fig, axes = plt.subplots(3, 3, figsize=(15, 12))
@@ -201,7 +341,8 @@ class Backtester:
         
         # Add drawdown shading
         cumulative = equity_curve / equity_curve.iloc[0]
-        running_max = cumulative.expanding().max()
+        # fmax skips NaN like expanding().max()
+        running_max = pd.Series(np.fmax.accumulate(cumulative.to_numpy()), index=cumulative.index)
         drawdown = (cumulative - running_max) / running_max
         ax.fill_between(equity_curve.index, 
                         equity_curve, 
@@ -259,9 +400,10 @@ class Backtester:
         
         # 6. Rolling Sharpe
         ax = axes[2, 1]
-        rolling_sharpe = (
-            returns.rolling(60).mean() / returns.rolling(60).std() * np.sqrt(252)
-        )
+        r = returns.to_numpy(dtype=np.float64)
+        roll_mean = bn.move_mean(r, 60, min_count=60)
+        roll_std = bn.move_std(r, 60, min_count=60, ddof=1)
+        rolling_sharpe = pd.Series(roll_mean / roll_std * np.sqrt(252), index=returns.index)
         rolling_sharpe.plot(ax=ax, linewidth=2)
         ax.axhline(y=0, color='black', linestyle='-', alpha=0.3)
         ax.axhline(y=1, color='green', linestyle='--', alpha=0.5, label='Sharpe = 1')
@@ -294,5 +436,10 @@ class Backtester:
         ax.grid(True, alpha=0.3)
 
         plt.tight_layout()
-        plt.savefig('results/backtest_results_'+ticker_a+'vs'+ticker_b+'.png', dpi=300, bbox_inches='tight')
+        path = 'results/backtest_results_'+ticker_a+'vs'+ticker_b+'.png'
+        if matplotlib.get_backend().lower() == 'agg':
+            # Nothing to show, so rasterize off the caller's thread
+            plt.close(fig)
+            return _SAVE_EXECUTOR.submit(fig.savefig, path, dpi=300, bbox_inches='tight')
+        plt.savefig(path, dpi=300, bbox_inches='tight')
         plt.show()
\ No newline at end of file
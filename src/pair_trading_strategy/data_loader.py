@@ -5,23 +5,36 @@ Author: tperera
 Date: 2025-11-23
 License: MIT
 """
+import hashlib
+import os
 import yfinance as yf
 import pandas as pd
 from datetime import datetime
 
 class DataLoader:
     """Handles data fetching and preprocessing"""
-    def __init__(self, start_date, end_date, interval):
+    def __init__(self, start_date, end_date, interval, cache_dir='~/.cache/pairs', dtype='float64'):
         """
         Initialize data loader with date range.
         
         Args:
             start_date: Start date in 'YYYY-MM-DD' format
             end_date: End date in 'YYYY-MM-DD' format
+            cache_dir: Directory for cached downloads, None disables caching.
+                yfinance returns dividend/split-adjusted prices, which it
+                rewrites after later corporate actions, so a cached range
+                can drift from a fresh download; delete the directory (or
+                pass None) to refetch
+            dtype: Float dtype for price columns; 'float32' halves the
+                memory of large universes (strategy math still accumulates
+                in float64)
         """
         self.start_date = start_date
         self.end_date = end_date
         self.interval = interval
+        self.cache_dir = os.path.expanduser(cache_dir) if cache_dir is not None else None
+        self.dtype = dtype
+        self._universe_df = None
         self._validate_inputs()
 
     def _validate_inputs(self):
@@ -38,6 +51,8 @@ class DataLoader:
             raise ValueError("End date cannot be in the future")
         if self.interval not in valid_intervals:
             raise ValueError("Invalid interval")
+        if self.dtype not in ('float64', 'float32'):
+            raise ValueError("dtype must be 'float64' or 'float32'")
         if self.interval in intraday_intervals:
             duration = end_date_obj - start_date_obj
             if duration.days > 60:
@@ -45,7 +60,74 @@ class DataLoader:
         print("Created a dataloader without any issues.")
 
         
+    def _cache_path(self, tickers):
+        """Parquet file keyed on the tickers and the requested date range"""
+        if isinstance(tickers, str):
+            tickers = [tickers]
+        key = repr((sorted(tickers), self.start_date, self.end_date, self.interval))
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.parquet")
+
+    def _download(self, tickers):
+        """Download from yfinance, reusing cached downloads"""
+        if self.cache_dir is None:
+            data = yf.download(tickers, start=self.start_date, end=self.end_date, interval=self.interval)
+            return self._cast(data)
+        # Cached ranges are served as-is, even though later dividends and
+        # splits change yfinance's adjusted history; partial downloads are
+        # never written
+        path = self._cache_path(tickers)
+        if os.path.exists(path):
+            return self._cast(pd.read_parquet(path, engine='pyarrow'))
+        data = yf.download(tickers, start=self.start_date, end=self.end_date, interval=self.interval)
+        if self._is_complete(data, tickers):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            data.to_parquet(path, engine='pyarrow')
+        return self._cast(data)
+
+    @staticmethod
+    def _is_complete(data, tickers):
+        """True when every requested ticker came back with some data"""
+        if data is None or data.empty:
+            return False
+        # yfinance keeps failed tickers (e.g. rate-limited) as all-NaN columns
+        has_data = data.notna().any()
+        if not isinstance(data.columns, pd.MultiIndex):
+            return bool(has_data.all())
+        requested = [tickers] if isinstance(tickers, str) else list(tickers)
+        per_ticker = has_data.groupby(level=-1).all()
+        return all(per_ticker.get(ticker, False) for ticker in requested)
+
+    def _cast(self, data):
+        """Downcast float64 columns when a float32 loader was requested"""
+        if data is None or self.dtype == 'float64':
+            return data
+        columns = data.select_dtypes('float64').columns
+        return data.astype({col: self.dtype for col in columns})
+
+    def fetch_universe(self, tickers):
+        """
+        Fetch a whole ticker universe in one batched download.
+        
+        Later fetch_data calls for tickers in the universe are served
+        from memory instead of issuing one download per pair.
+        
+        Args:
+            tickers: List of all tickers to screen
+        
+        Returns:
+            DataFrame with (Price, Ticker) columns for the whole universe
+        """
+        self._universe_df = self._download(list(tickers))
+        return self._universe_df
+
     def fetch_data(self, tickers):
         """Fetch historical data for list of tickers"""
-        data = yf.download(tickers, start=self.start_date, end=self.end_date, interval=self.interval)
-        return data    
\ No newline at end of file
+        if self._universe_df is not None:
+            requested = [tickers] if isinstance(tickers, str) else list(tickers)
+            available = self._universe_df.columns.get_level_values(-1)
+            if all(ticker in available for ticker in requested):
+                data = self._universe_df.loc[:, pd.IndexSlice[:, requested]]
+                # Drop dates on which only other tickers in the universe traded
+                return data.dropna(how='all')
+        return self._download(tickers)
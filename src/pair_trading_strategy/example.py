@@ -6,9 +6,8 @@ from data_loader import DataLoader
 from pairs_strategy import PairsTradingStrategy
 from back_test import Backtester
 import pandas as pd
-import matplotlib.pyplot as plt
 
-def run_pairs_trading_analysis(ticker_a, ticker_b, start_date, end_date):
+def run_pairs_trading_analysis(ticker_a, ticker_b, start_date, end_date, plot=False):
     """
     Complete pairs trading workflow from data loading to results.
     
@@ -17,6 +16,9 @@ def run_pairs_trading_analysis(ticker_a, ticker_b, start_date, end_date):
         ticker_b: Second stock ticker (e.g., 'PEP')
         start_date: Start date for data (e.g., '2020-01-01')
         end_date: End date for data (e.g., '2024-01-01')
+        plot: Render and save the results figure (default: False); under
+            a non-interactive backend the save runs in the background and
+            its future is returned as 'saved'
     
     Returns:
         Dictionary with results and metrics
@@ -144,7 +146,11 @@ def run_pairs_trading_analysis(ticker_a, ticker_b, start_date, end_date):
     # STEP 8: VISUALIZE
     # =============================================================================
 
-    backtester.plot_results(
+    if not plot:
+        return {'results': results, 'metrics': metrics}
+
+    # Future of the background save under a non-interactive backend, else None
+    saved = backtester.plot_results(
         ticker_a=ticker_a,
         ticker_b=ticker_b,
         start_date=start_date,
@@ -160,7 +166,8 @@ def run_pairs_trading_analysis(ticker_a, ticker_b, start_date, end_date):
         zscore=zscore,
         prices_a=prices_a,
         prices_b=prices_b
-    )    
+    )
+    return {'results': results, 'metrics': metrics, 'saved': saved}
 
 if __name__ == "__main__":
     # Example 1: Basic usage
@@ -172,8 +179,12 @@ if __name__ == "__main__":
         ticker_a='KO',
         ticker_b='PEP',
         start_date='2013-01-01',
-        end_date='2015-01-01'
+        end_date='2015-01-01',
+        plot=True
     )
+    # Surface a failed figure save (e.g. missing results/ directory)
+    if analysis is not None and analysis['saved'] is not None:
+        analysis['saved'].result()
 
     # analysis = run_pairs_trading_analysis(
     #     ticker_a='SPY',
@@ -8,9 +8,187 @@ Author: tperera
 Date: 2025-11-23
 License: MIT
 """
+from itertools import combinations, product
+import numpy as np
 import pandas as pd
+from joblib import Parallel, cpu_count, delayed, effective_n_jobs
+from numba import njit, prange
+from statsmodels.tsa.adfvalues import mackinnonp
 from statsmodels.tsa.stattools import coint
 
+
+def _fast_coint(y0, y1, maxlag=1):
+    """
+    Engle-Granger test with a fixed-lag ADF, using plain least squares.
+    
+    Same regressions as statsmodels coint(y0, y1, maxlag=maxlag,
+    autolag=None) (y0 on a constant and y1, then ADF without constant on
+    the residuals) but skips result objects and the lag search.
+    
+    Returns:
+        Tuple of (t-statistic, MacKinnon p-value)
+    """
+    y0 = np.asarray(y0, dtype=np.float64)
+    y1 = np.asarray(y1, dtype=np.float64)
+    # 1. Cointegrating regression
+    X = np.column_stack([np.ones_like(y1), y1])
+    beta, *_ = np.linalg.lstsq(X, y0, rcond=None)
+    resid = y0 - X @ beta
+    # 2. ADF regression: diff(resid) on lagged level and lagged differences
+    dresid = np.diff(resid)
+    n = len(dresid)
+    Z = np.column_stack(
+        [resid[maxlag:-1]] + [dresid[maxlag - j:n - j] for j in range(1, maxlag + 1)]
+    )
+    y = dresid[maxlag:]
+    coef, *_ = np.linalg.lstsq(Z, y, rcond=None)
+    errors = y - Z @ coef
+    sigma2 = (errors @ errors) / (len(y) - Z.shape[1])
+    tstat = coef[0] / np.sqrt(sigma2 * np.linalg.inv(Z.T @ Z)[0, 0])
+    # 3. Asymptotic p-value from MacKinnon's response-surface tables
+    pvalue = mackinnonp(tstat, regression='c', N=2)
+    return tstat, pvalue
+
+
+def _same_index(prices_a, prices_b):
+    """True when both series are already on identical dates"""
+    return prices_a.index is prices_b.index or prices_a.index.equals(prices_b.index)
+
+
+def _screen_pair(X, i, j, maxlag=1):
+    """Fast Engle-Granger p-value of columns i and j over their common rows"""
+    y0, y1 = X[:, i], X[:, j]
+    valid = ~(np.isnan(y0) | np.isnan(y1))
+    # Too few rows for the ADF regression, e.g. a ticker that failed to download
+    if valid.sum() < maxlag + 4:
+        return np.nan
+    return _fast_coint(y0[valid], y1[valid], maxlag=maxlag)[1]
+
+
+def _screen_batch(X, pairs):
+    """P-values for a batch of (i, j) column pairs, one worker task"""
+    return [_screen_pair(X, i, j) for i, j in pairs]
+
+
+@njit
+def _fsm_step(position, zi, entry, exit_t):
+    """One transition of the flat / long / short signal state machine"""
+    if zi != zi:
+        # NaN z-score: hold current position
+        return position
+    if position == 0:
+        if zi > entry:
+            return -1
+        if zi < -entry:
+            return 1
+    elif abs(zi) < exit_t:
+        return 0
+    return position
+
+
+@njit
+def _window_add(xi, count, mean, m2):
+    """Welford update adding one observation to the rolling window"""
+    if xi == xi:
+        count += 1
+        delta = xi - mean
+        mean += delta / count
+        m2 += delta * (xi - mean)
+    return count, mean, m2
+
+
+@njit
+def _window_remove(xo, count, mean, m2):
+    """Welford update removing one observation from the rolling window"""
+    if xo == xo:
+        count -= 1
+        if count == 0:
+            return 0, 0.0, 0.0
+        delta = xo - mean
+        mean -= delta / count
+        m2 -= delta * (xo - mean)
+    return count, mean, m2
+
+
+@njit(error_model='numpy')
+def _window_zscore(xi, count, mean, m2, window):
+    """Z-score of xi against the current window, NaN until the window is full"""
+    if count < window:
+        # Warm-up bars or a NaN inside the window, as pandas rolling
+        return np.nan
+    return (xi - mean) / np.sqrt(max(m2, 0.0) / (window - 1))
+
+
+@njit
+def _fsm_signals(z, entry, exit_t):
+    """Compiled signal state machine over a float64 z-score array"""
+    n = z.shape[0]
+    out = np.empty(n, dtype=np.int8)
+    position = 0
+    for i in range(n):
+        position = _fsm_step(position, z[i], entry, exit_t)
+        out[i] = position
+    return out
+
+
+@njit
+def _rolling_zscore(x, window):
+    """Single-pass sliding-window z-score (Welford add/remove updates)"""
+    n = x.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    count, mean, m2 = 0, 0.0, 0.0
+    for i in range(n):
+        count, mean, m2 = _window_add(x[i], count, mean, m2)
+        if i >= window:
+            count, mean, m2 = _window_remove(x[i - window], count, mean, m2)
+        out[i] = _window_zscore(x[i], count, mean, m2, window)
+    return out
+
+
+@njit
+def _spread_to_signals(a, b, beta, window, entry, exit_t):
+    """Fused spread -> rolling z-score -> signal pass with one output array"""
+    n = a.shape[0]
+    out = np.empty(n, dtype=np.int8)
+    count, mean, m2 = 0, 0.0, 0.0
+    position = 0
+    for i in range(n):
+        si = b[i] - beta * a[i]
+        count, mean, m2 = _window_add(si, count, mean, m2)
+        if i >= window:
+            so = b[i - window] - beta * a[i - window]
+            count, mean, m2 = _window_remove(so, count, mean, m2)
+        zi = _window_zscore(si, count, mean, m2, window)
+        position = _fsm_step(position, zi, entry, exit_t)
+        out[i] = position
+    return out
+
+
+@njit(parallel=True)
+def _sweep_signals(spread, windows, window_idx, entries, exits):
+    """
+    Signals for a parameter grid as a (T, P) int8 array.
+    
+    One rolling z-score per distinct window, then one state machine per
+    grid column reading the z-score of its window; both loops run in
+    parallel across their parameter axis.
+    """
+    n = spread.shape[0]
+    z = np.empty((windows.shape[0], n), dtype=np.float64)
+    for k in prange(windows.shape[0]):
+        z[k] = _rolling_zscore(spread, windows[k])
+    out = np.empty((n, entries.shape[0]), dtype=np.int8)
+    for j in prange(entries.shape[0]):
+        out[:, j] = _fsm_signals(z[window_idx[j]], entries[j], exits[j])
+    return out
+
+
+# Pair-bars below which screen_pairs runs serially: a pair costs about
+# 0.15 us per bar, so this is ~8 s of serial work, the same order as
+# starting cold workers and importing pandas/statsmodels in each of them
+_SCREEN_PARALLEL_MIN_WORK = 50_000_000
+
+
 class PairsTradingStrategy:
     """
     Market-neutral pairs trading using cointegration and mean reversion.
@@ -33,16 +211,12 @@ class PairsTradingStrategy:
         self._validate_parameters()
 
     def _align_series(self, prices_a, prices_b):
-        """Using explicit index intersection"""
-        # Find common dates
-        common_dates = prices_a.index.intersection(prices_b.index)
-        # Select only common dates
-        aligned_a = prices_a.loc[common_dates]
-        aligned_b = prices_b.loc[common_dates]
-        # Drop NaN values
-        combined = pd.DataFrame({'a': aligned_a, 'b': aligned_b})
-        combined = combined.dropna()
-        # return combined['a'], combined['b']
+        """
+        Pass the price series through unchanged.
+        
+        NaN rows are kept so results stay on the input index; the spread
+        arithmetic and compute_signals outer-join mismatched indexes.
+        """
         return prices_a, prices_b
 
     
@@ -56,7 +230,7 @@ class PairsTradingStrategy:
         if self.lookback_period < 20:
             raise ValueError("Lookback period should be at least 20 days")
 
-    def test_cointegration(self, prices_a, prices_b, significance_level = 0.05):
+    def test_cointegration(self, prices_a, prices_b, significance_level = 0.05, engine='statsmodels'):
         """
         Test for cointegration using Engle-Granger method.
         
@@ -70,6 +244,8 @@ class PairsTradingStrategy:
             prices_a: Price series for stock A
             prices_b: Price series for stock B
             significance_level: P-value threshold (default: 0.05)
+            engine: 'statsmodels' (AIC lag selection, default) or 'numpy'
+                (fixed one-lag ADF, much faster for screening many pairs)
         
         Returns:
             Tuple of (is_cointegrated: bool, p_value: float)
@@ -77,10 +253,60 @@ class PairsTradingStrategy:
         # Align series (remove NaN)
         aligned_a, aligned_b = self._align_series(prices_a, prices_b)
         # Perform cointegration test
-        score, pvalue, _ = coint(aligned_a, aligned_b)
+        if engine == 'statsmodels':
+            score, pvalue, _ = coint(aligned_a, aligned_b)
+        elif engine == 'numpy':
+            score, pvalue = _fast_coint(aligned_a, aligned_b)
+        else:
+            raise ValueError(f"Unknown engine '{engine}', expected 'statsmodels' or 'numpy'")
         is_cointegrated = pvalue < significance_level
         return is_cointegrated, pvalue
 
+    def screen_pairs(self, prices, significance_level = 0.05, n_jobs = None):
+        """
+        Screen every pair in a price universe for cointegration.
+        
+        Runs the fast fixed-lag Engle-Granger test (engine='numpy' in
+        test_cointegration) on each column pair. Each pair takes well
+        under a millisecond, so worker processes only pay off on large
+        universes: pairs are split into one batch per worker, and each
+        batch ships the price matrix once (memory-mapped by joblib above
+        its 1 MB max_nbytes, pickled below it).
+        
+        Args:
+            prices: DataFrame of prices with one column per ticker
+            significance_level: P-value threshold (default: 0.05)
+            n_jobs: Worker processes, -1 for all cores; None runs serially
+                unless the screen is large enough to repay worker start-up
+                (default: None)
+        
+        Returns:
+            DataFrame with ticker_a, ticker_b, pvalue and is_cointegrated
+            columns, sorted by ascending p-value; pairs with too few common
+            prices to test (e.g. a failed download) get a NaN p-value last
+        """
+        X = np.asarray(prices, dtype=np.float64)
+        pairs = list(combinations(range(X.shape[1]), 2))
+        if n_jobs is None:
+            n_jobs = 1 if len(pairs) * X.shape[0] < _SCREEN_PARALLEL_MIN_WORK else cpu_count()
+        n_jobs = min(effective_n_jobs(n_jobs), max(len(pairs), 1))
+        if n_jobs == 1:
+            pvalues = _screen_batch(X, pairs)
+        else:
+            batches = [list(batch) for batch in np.array_split(np.arange(len(pairs)), n_jobs)]
+            results = Parallel(n_jobs=n_jobs, prefer='processes')(
+                delayed(_screen_batch)(X, [pairs[k] for k in batch]) for batch in batches
+            )
+            pvalues = [pvalue for batch in results for pvalue in batch]
+        tickers = list(prices.columns)
+        screen = pd.DataFrame({
+            'ticker_a': [tickers[i] for i, _ in pairs],
+            'ticker_b': [tickers[j] for _, j in pairs],
+            'pvalue': np.asarray(pvalues, dtype=np.float64),
+        })
+        screen['is_cointegrated'] = screen['pvalue'] < significance_level
+        return screen.sort_values('pvalue', ignore_index=True)
+
     def calculate_hedge_ratio(self, prices_a, prices_b):
         """
         Calculate optimal hedge ratio using OLS regression.
@@ -100,16 +326,14 @@ class PairsTradingStrategy:
         Returns:
             Hedge ratio (beta coefficient)
         """
-        from scipy import stats
-        
         # Align series
         aligned_a, aligned_b = self._align_series(prices_a, prices_b)
-        # OLS regression
-        slope, intercept, r_value, p_value, std_err = stats.linregress(
-            aligned_a, aligned_b
-        )
-        
-        return slope
+        # OLS slope in closed form: cov(a, b) / var(a)
+        a = np.asarray(aligned_a, dtype=np.float64)
+        b = np.asarray(aligned_b, dtype=np.float64)
+        a = a - a.mean()
+        b = b - b.mean()
+        return (a @ b) / (a @ a)
 
 
     def calculate_spread(self, prices_a, prices_b, hedge_ratio):
@@ -148,12 +372,82 @@ class PairsTradingStrategy:
         Returns:
             Z-score time series
         """
-        rolling_mean = spread.rolling(window=self.lookback_period).mean()
-        rolling_std = spread.rolling(window=self.lookback_period).std()
-        zscore = (spread - rolling_mean) / rolling_std
-        return zscore
+        x = np.ascontiguousarray(spread, dtype=np.float64)
+        zscore = _rolling_zscore(x, int(self.lookback_period))
+        return pd.Series(zscore, index=spread.index, name=spread.name)
+
+    def compute_signals(self, prices_a, prices_b, hedge_ratio):
+        """
+        Compute trading signals straight from prices in one fused pass.
+        
+        Equivalent to calculate_spread -> calculate_zscore ->
+        generate_signals, without materializing the spread or z-score
+        series. Use the decomposed methods when those are needed for
+        inspection or plotting.
+        
+        Args:
+            prices_a: Price series for stock A
+            prices_b: Price series for stock B
+            hedge_ratio: The hedge ratio from regression
+        
+        Returns:
+            Signal series (1: long spread, -1: short spread, 0: no position)
+        """
+        aligned_a, aligned_b = self._align_series(prices_a, prices_b)
+        # Same outer join the spread arithmetic performs on mismatched indexes
+        if not _same_index(aligned_a, aligned_b):
+            aligned_a, aligned_b = aligned_a.align(aligned_b)
+        a = np.ascontiguousarray(aligned_a, dtype=np.float64)
+        b = np.ascontiguousarray(aligned_b, dtype=np.float64)
+        signals = _spread_to_signals(
+            a, b, float(hedge_ratio), int(self.lookback_period),
+            float(self.entry_threshold), float(self.exit_threshold)
+        )
+        return pd.Series(signals, index=aligned_b.index)
+
+    def sweep_signals(self, prices_a, prices_b, hedge_ratio, lookback_periods,
+                      entry_thresholds, exit_thresholds):
+        """
+        Generate signals for a whole grid of strategy parameters at once.
+        
+        Every (lookback, entry, exit) combination with entry > exit
+        becomes one column; each column equals what generate_signals
+        returns for a strategy built with those parameters. Pass the
+        result to Backtester.run_sweep to score the grid.
+        
+        Args:
+            prices_a: Price series for stock A
+            prices_b: Price series for stock B
+            hedge_ratio: The hedge ratio from regression
+            lookback_periods: Rolling windows to try
+            entry_thresholds: Entry z-scores to try
+            exit_thresholds: Exit z-scores to try
+        
+        Returns:
+            Tuple of (params DataFrame with lookback_period,
+            entry_threshold and exit_threshold columns, signals DataFrame
+            with one column per params row)
+        """
+        if min(lookback_periods) < 20:
+            raise ValueError("Lookback period should be at least 20 days")
+        params = pd.DataFrame(
+            [(int(w), float(en), float(ex))
+             for w, en, ex in product(lookback_periods, entry_thresholds, exit_thresholds)
+             if en > ex],
+            columns=['lookback_period', 'entry_threshold', 'exit_threshold']
+        )
+        if params.empty:
+            raise ValueError("No (entry, exit) threshold combination has entry > exit")
+        aligned_a, aligned_b = self._align_series(prices_a, prices_b)
+        spread = self.calculate_spread(aligned_a, aligned_b, hedge_ratio)
+        windows, window_idx = np.unique(params['lookback_period'].to_numpy(), return_inverse=True)
+        signals = _sweep_signals(
+            np.ascontiguousarray(spread, dtype=np.float64), windows, window_idx,
+            params['entry_threshold'].to_numpy(), params['exit_threshold'].to_numpy()
+        )
+        return params, pd.DataFrame(signals, index=spread.index)
 
-    def generate_signals(self, zscore):
+    def generate_signals(self, zscore, engine='numba'):
         """
         Generate trading signals based on z-score thresholds.
         
@@ -165,29 +459,63 @@ class PairsTradingStrategy:
         
         Args:
             zscore: Z-score time series
+            engine: 'numba' (compiled kernel, default), 'numpy' (vectorized)
+                or 'python' (reference per-bar loop, kept for parity checking)
         
         Returns:
             Signal series (1: long spread, -1: short spread, 0: no position)
         """
-        signals = pd.Series(0, index=zscore.index)
+        if engine == 'numba':
+            z = np.ascontiguousarray(zscore, dtype=np.float64)
+            signals = _fsm_signals(z, float(self.entry_threshold), float(self.exit_threshold))
+            return pd.Series(signals, index=zscore.index)
+        if engine == 'numpy':
+            return self._generate_signals_numpy(zscore)
+        if engine == 'python':
+            return self._generate_signals_python(zscore)
+        raise ValueError(f"Unknown engine '{engine}', expected 'numba', 'numpy' or 'python'")
+
+    def _generate_signals_numpy(self, zscore):
+        """Vectorized position carry without a per-bar Python loop"""
+        z = np.asarray(zscore, dtype=np.float64)
+        n = len(z)
+        bars = np.arange(n)
+        # Threshold events (NaN compares False, so NaN bars hold position)
+        enter = np.select([z < -self.entry_threshold, z > self.entry_threshold], [1, -1], 0)
+        exit_mask = np.abs(z) < self.exit_threshold
+        # Each exit starts a new segment; within a segment only the first
+        # entry counts and is held until the next exit
+        segment_start = np.maximum.accumulate(np.where(exit_mask, bars, 0))
+        entry_bars = np.where(enter != 0, bars, n)
+        next_entry = np.minimum.accumulate(entry_bars[::-1])[::-1]
+        first_entry = next_entry[segment_start]
+        enter = np.append(enter, 0)
+        signals = np.where(first_entry <= bars, enter[first_entry], 0).astype(np.int8)
+        return pd.Series(signals, index=zscore.index)
+
+    def _generate_signals_python(self, zscore):
+        """Reference per-bar implementation of the signal state machine"""
+        # Plain ndarray reads/writes instead of per-bar .iloc dispatch
+        z = zscore.to_numpy(dtype=np.float64)
+        signals = np.zeros(len(z), dtype=np.int8)
         # Initialize position
         current_position = 0
-        for i in range(len(zscore)):
-            z = zscore.iloc[i]
-            if pd.isna(z):
-                signals.iloc[i] = current_position
+        for i in range(len(z)):
+            zi = z[i]
+            if np.isnan(zi):
+                signals[i] = current_position
                 continue
             # Entry logic
             if current_position == 0:
-                if z > self.entry_threshold:
+                if zi > self.entry_threshold:
                     current_position = -1  # Short spread
-                elif z < -self.entry_threshold:
+                elif zi < -self.entry_threshold:
                     current_position = 1   # Long spread
             # Exit logic
-            elif abs(z) < self.exit_threshold:
+            elif abs(zi) < self.exit_threshold:
                 current_position = 0  # Close position
-            signals.iloc[i] = current_position
-        return signals
+            signals[i] = current_position
+        return pd.Series(signals, index=zscore.index)
     
 if __name__ == "__main__":
     #Example use case of PairsTradingStrategy
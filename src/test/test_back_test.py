@@ -0,0 +1,108 @@
+"""
+Unit tests for Back testing class for Pairs Trading Strategy.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from ..pair_trading_strategy.back_test import Backtester
+
+class TestBacktester(unittest.TestCase):
+
+    def setUp(self):
+        self.backtester = Backtester(initial_capital=100000, transaction_cost=0.001)
+        index = pd.date_range('2020-01-01', periods=5, freq='D')
+        self.prices_a = pd.Series([100.0, 101.0, 99.0, 100.0, 102.0], index=index)
+        self.prices_b = pd.Series([50.0, 50.5, 51.0, 50.0, 50.0], index=index)
+        self.signals = pd.Series([0, 1, 1, 0, -1], index=index)
+        # Longer independent random-walk pair for sweep and plotting tests
+        rng = np.random.default_rng(8)
+        index = pd.date_range('2020-01-01', periods=200, freq='D')
+        self.walk_a = pd.Series(100 + rng.normal(0, 1, size=200).cumsum(), index=index)
+        self.walk_b = pd.Series(50 + rng.normal(0, 1, size=200).cumsum(), index=index)
+
+    def test_run_backtest(self):
+        results = self.backtester.run_backtest(self.prices_a, self.prices_b, self.signals, hedge_ratio=2.0)
+        returns_a = self.prices_a.pct_change()
+        returns_b = self.prices_b.pct_change()
+        # Bar 0 is dropped (no return), bar 2 carries the long from bar 1
+        expected_abs = -50000 * returns_a.iloc[2] + 100000 * returns_b.iloc[2]
+        self.assertTrue(results['returns'].index.equals(self.signals.index[1:]))
+        self.assertTrue(np.isnan(results['returns'].iloc[0]))
+        self.assertAlmostEqual(results['returns_abs'].iloc[1], expected_abs)
+        self.assertAlmostEqual(results['returns'].iloc[1], expected_abs / 100000)
+        # Closing the long on bar 3 pays one unit of transaction cost
+        expected_close = (-50000 * returns_a.iloc[3] + 100000 * returns_b.iloc[3]) / 100000 - 0.001
+        self.assertAlmostEqual(results['returns'].iloc[2], expected_close)
+        np.testing.assert_allclose(
+            results['equity'].iloc[1:].values,
+            100000 * (1 + results['returns'].iloc[1:]).cumprod().values
+        )
+        self.assertEqual(list(results['trades']), list(self.signals.index[[1, 3, 4]]))
+
+    def test_run_backtest_misaligned_inputs(self):
+        results = self.backtester.run_backtest(self.prices_a.iloc[1:], self.prices_b, self.signals.iloc[:-1], hedge_ratio=2.0)
+        self.assertTrue(results['equity'].index.equals(self.signals.index[2:4]))
+
+    def test_calculate_performance_metrics_matches_pandas(self):
+        rng = np.random.default_rng(1)
+        returns = pd.Series(rng.normal(0.0005, 0.01, size=600))
+        returns.iloc[0] = np.nan
+        metrics = self.backtester.calculate_performance_metrics(returns)
+        cumulative = (1 + returns).cumprod()
+        drawdown = (cumulative - cumulative.expanding().max()) / cumulative.expanding().max()
+        self.assertAlmostEqual(metrics['Total Return'], (1 + returns).prod() - 1)
+        self.assertAlmostEqual(metrics['Annual Volatility'], returns.std() * np.sqrt(252))
+        self.assertAlmostEqual(metrics['Max Drawdown'], drawdown.min())
+        self.assertAlmostEqual(metrics['Win Rate'], (returns > 0).sum() / len(returns))
+        self.assertAlmostEqual(
+            metrics['Profit Factor'],
+            returns[returns > 0].sum() / abs(returns[returns < 0].sum())
+        )
+
+    def test_calculate_performance_metrics_caps_total_loss(self):
+        # Wipe-out after a gain, as the first valid bar, and at exactly -100%
+        for values in ([np.nan, 0.01, -1.5, 0.02, -0.01], [np.nan, -1.5, 0.01, 0.02], [np.nan, -1.0, 0.5]):
+            metrics = self.backtester.calculate_performance_metrics(pd.Series(values))
+            self.assertEqual(metrics['Total Return'], -1.0)
+            self.assertEqual(metrics['Annual Return'], -1.0)
+            self.assertEqual(metrics['Max Drawdown'], -1.0)
+            self.assertEqual(metrics['Calmar Ratio'], -1.0)
+
+    def test_run_sweep_matches_run_backtest(self):
+        rng = np.random.default_rng(9)
+        prices_a, prices_b = self.walk_a, self.walk_b
+        signals = pd.DataFrame(rng.integers(-1, 2, size=(len(prices_a), 3)), index=prices_a.index)
+        sweep = self.backtester.run_sweep(prices_a, prices_b, signals, hedge_ratio=2.0)
+        for column in signals.columns:
+            results = self.backtester.run_backtest(prices_a, prices_b, signals[column], hedge_ratio=2.0)
+            expected = self.backtester.calculate_performance_metrics(results['returns'])
+            for key, value in expected.items():
+                self.assertAlmostEqual(sweep.loc[column, key], value)
+
+    def test_plot_results_saves_in_background_on_agg(self):
+        prices_a, prices_b = self.walk_a, self.walk_b
+        signals = pd.Series(np.repeat([0, 1, 0, -1], 50), index=prices_a.index)
+        results = self.backtester.run_backtest(prices_a, prices_b, signals, hedge_ratio=2.0)
+        spread = prices_b - 2.0 * prices_a
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch('matplotlib.get_backend', return_value='agg'):
+            os.makedirs(os.path.join(tmp_dir, 'results'))
+            cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                future = self.backtester.plot_results(
+                    'AAA', 'BBB', '2020-01-01', '2020-05-01',
+                    results['equity'], results['returns'], results['returns_abs'],
+                    results['transaction_costs'], results['positions_a'], results['positions_b'],
+                    signals, spread, (spread - spread.mean()) / spread.std(), prices_a, prices_b
+                )
+                future.result()
+                self.assertTrue(os.path.exists('results/backtest_results_AAAvsBBB.png'))
+            finally:
+                os.chdir(cwd)
+
+if __name__ == '__main__':
+    unittest.main()
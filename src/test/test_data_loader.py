@@ -2,11 +2,21 @@
 Unit tests for Data loading class for Pairs Trading Strategy.
 """
 
+import tempfile
 import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
 from ..pair_trading_strategy.data_loader import DataLoader
 
 class TestDataLoader(unittest.TestCase):
 
+    def setUp(self):
+        # Fake two-ticker yfinance download
+        columns = pd.MultiIndex.from_product([['Close', 'Open'], ['KO', 'PEP']], names=['Price', 'Ticker'])
+        self.index = pd.date_range('2025-07-25', periods=3, freq='D', name='Date')
+        self.frame = pd.DataFrame(np.arange(12, dtype=float).reshape(3, 4), index=self.index, columns=columns)
+
     def test_setup(self):
         print("----------------------------")
         print("Starting a data loader setup")
@@ -15,5 +25,42 @@ class TestDataLoader(unittest.TestCase):
         self.assertEqual(DL.end_date, '2025-08-25')
         self.assertEqual(DL.interval, '90m')
 
+    def test_fetch_data_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            DL = DataLoader('2025-07-25', '2025-08-25', '1d', cache_dir=cache_dir)
+            with mock.patch('yfinance.download', return_value=self.frame) as download:
+                first = DL.fetch_data(['KO', 'PEP'])
+                second = DL.fetch_data(['PEP', 'KO'])
+            self.assertEqual(download.call_count, 1)
+            pd.testing.assert_frame_equal(first, second, check_index_type=False, check_freq=False)
+
+    def test_fetch_data_skips_cache_on_failed_ticker(self):
+        frame = self.frame.copy()
+        frame.loc[:, pd.IndexSlice[:, 'PEP']] = np.nan
+        with tempfile.TemporaryDirectory() as cache_dir:
+            DL = DataLoader('2025-07-25', '2025-08-25', '1d', cache_dir=cache_dir)
+            with mock.patch('yfinance.download', return_value=frame) as download:
+                DL.fetch_data(['KO', 'PEP'])
+                DL.fetch_data(['KO', 'PEP'])
+            self.assertEqual(download.call_count, 2)
+
+    def test_fetch_data_from_universe(self):
+        columns = pd.MultiIndex.from_product([['Close', 'Open'], ['KO', 'PEP', 'SPY']], names=['Price', 'Ticker'])
+        frame = pd.DataFrame(np.arange(18, dtype=float).reshape(3, 6), index=self.index, columns=columns)
+        DL = DataLoader('2025-07-25', '2025-08-25', '1d', cache_dir=None)
+        with mock.patch('yfinance.download', return_value=frame) as download:
+            DL.fetch_universe(['KO', 'PEP', 'SPY'])
+            pair = DL.fetch_data(['KO', 'PEP'])
+        self.assertEqual(download.call_count, 1)
+        self.assertEqual(list(pair['Open'].columns), ['KO', 'PEP'])
+        self.assertEqual(pair['Open']['PEP'].iloc[0], frame['Open']['PEP'].iloc[0])
+
+    def test_fetch_data_float32(self):
+        DL = DataLoader('2025-07-25', '2025-08-25', '1d', cache_dir=None, dtype='float32')
+        with mock.patch('yfinance.download', return_value=self.frame):
+            data = DL.fetch_data(['KO', 'PEP'])
+        self.assertTrue((data.dtypes == np.float32).all())
+        np.testing.assert_array_equal(data.to_numpy(), self.frame.to_numpy())
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
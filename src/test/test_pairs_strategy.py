@@ -0,0 +1,127 @@
+"""
+Unit tests for Pairs Trading Strategy class.
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from scipy.stats import linregress
+from statsmodels.tsa.stattools import coint
+from ..pair_trading_strategy.pairs_strategy import PairsTradingStrategy, _fast_coint
+
+class TestPairsTradingStrategy(unittest.TestCase):
+
+    def setUp(self):
+        self.strategy = PairsTradingStrategy(lookback_period=20, entry_threshold=2.0, exit_threshold=0.5)
+        rng = np.random.default_rng(0)
+        index = pd.date_range('2020-01-01', periods=500, freq='D')
+        self.zscore = pd.Series(rng.normal(0, 1.5, size=500), index=index)
+        self.zscore.iloc[:19] = np.nan
+        # Cointegrated random-walk pair: B tracks 1.5 x A plus noise
+        rng = np.random.default_rng(2)
+        self.prices_a = pd.Series(60 + rng.normal(0, 1, size=400).cumsum(), index=index[:400])
+        self.prices_b = 1.5 * self.prices_a + rng.normal(0, 2, size=400)
+
+    def test_fast_coint_matches_statsmodels(self):
+        prices_a = self.prices_a.to_numpy()
+        prices_b = self.prices_b.to_numpy()
+        for maxlag in (1, 3):
+            expected_t, expected_p, _ = coint(prices_a, prices_b, maxlag=maxlag, autolag=None)
+            tstat, pvalue = _fast_coint(prices_a, prices_b, maxlag=maxlag)
+            self.assertAlmostEqual(tstat, expected_t, places=8)
+            self.assertAlmostEqual(pvalue, expected_p, places=8)
+
+    def test_calculate_zscore_matches_pandas_rolling(self):
+        rng = np.random.default_rng(1)
+        spread = pd.Series(50 + rng.normal(0, 2, size=300).cumsum(), index=self.zscore.index[:300])
+        spread.iloc[150] = np.nan
+        window = self.strategy.lookback_period
+        expected = (spread - spread.rolling(window).mean()) / spread.rolling(window).std()
+        zscore = self.strategy.calculate_zscore(spread)
+        np.testing.assert_allclose(zscore.values, expected.values, rtol=1e-9, atol=1e-9)
+        self.assertTrue(zscore.index.equals(spread.index))
+
+    def test_generate_signals_matches_python_engine(self):
+        expected = self.strategy.generate_signals(self.zscore, engine='python')
+        for engine in ('numba', 'numpy'):
+            signals = self.strategy.generate_signals(self.zscore, engine=engine)
+            np.testing.assert_array_equal(signals.values, expected.values)
+            self.assertEqual(signals.dtype, expected.dtype)
+            self.assertTrue(signals.index.equals(self.zscore.index))
+
+    def test_generate_signals_holds_through_opposite_entry(self):
+        # Long entry followed directly by a short-entry bar must hold the long
+        zscore = pd.Series([np.nan, -2.5, 1.0, 2.5, np.nan, 0.2, 3.0])
+        for engine in ('numba', 'numpy', 'python'):
+            signals = self.strategy.generate_signals(zscore, engine=engine)
+            self.assertEqual(list(signals), [0, 1, 1, 1, 1, 0, -1])
+
+    def test_compute_signals_matches_decomposed_pipeline(self):
+        prices_a, prices_b = self.prices_a, self.prices_b
+        hedge_ratio = self.strategy.calculate_hedge_ratio(prices_a, prices_b)
+        spread = self.strategy.calculate_spread(prices_a, prices_b, hedge_ratio)
+        expected = self.strategy.generate_signals(self.strategy.calculate_zscore(spread))
+        signals = self.strategy.compute_signals(prices_a, prices_b, hedge_ratio)
+        np.testing.assert_array_equal(signals.values, expected.values)
+        self.assertTrue(signals.index.equals(expected.index))
+
+    def test_screen_pairs_matches_numpy_engine(self):
+        rng = np.random.default_rng(6)
+        prices = pd.DataFrame({
+            'A': self.prices_a,
+            'B': self.prices_b,
+            'C': 40 + rng.normal(0, 1, size=len(self.prices_a)).cumsum(),
+        })
+        screen = self.strategy.screen_pairs(prices, n_jobs=1)
+        self.assertEqual(len(screen), 3)
+        self.assertTrue(screen['pvalue'].is_monotonic_increasing)
+        self.assertEqual((screen['ticker_a'].iloc[0], screen['ticker_b'].iloc[0]), ('A', 'B'))
+        for row in screen.itertuples():
+            _, expected = self.strategy.test_cointegration(prices[row.ticker_a], prices[row.ticker_b], engine='numpy')
+            self.assertAlmostEqual(row.pvalue, expected)
+        parallel = self.strategy.screen_pairs(prices, n_jobs=2)
+        pd.testing.assert_frame_equal(parallel, screen)
+        # Small screens default to the serial path
+        pd.testing.assert_frame_equal(self.strategy.screen_pairs(prices), screen)
+
+    def test_screen_pairs_skips_dead_ticker(self):
+        # yfinance leaves a failed ticker as an all-NaN column
+        prices = pd.DataFrame({'A': self.prices_a, 'B': self.prices_b, 'D': np.nan})
+        prices['E'] = np.nan
+        prices.iloc[:3, prices.columns.get_loc('E')] = 1.0
+        screen = self.strategy.screen_pairs(prices, n_jobs=1)
+        self.assertEqual(len(screen), 6)
+        self.assertEqual((screen['ticker_a'].iloc[0], screen['ticker_b'].iloc[0]), ('A', 'B'))
+        self.assertTrue(screen['pvalue'].iloc[1:].isna().all())
+        self.assertFalse(screen['is_cointegrated'].iloc[1:].any())
+
+    def test_calculate_hedge_ratio_matches_linregress(self):
+        prices_a, prices_b = self.prices_a, self.prices_b
+        expected = linregress(prices_a, prices_b).slope
+        self.assertAlmostEqual(self.strategy.calculate_hedge_ratio(prices_a, prices_b), expected, places=10)
+
+    def test_align_series_passes_inputs_through(self):
+        prices_a = pd.Series([60.5, np.nan, 65.0])
+        prices_b = pd.Series([180.0, 184.5, 186.0], index=[1, 2, 3])
+        aligned_a, aligned_b = self.strategy._align_series(prices_a, prices_b)
+        self.assertIs(aligned_a, prices_a)
+        self.assertIs(aligned_b, prices_b)
+
+    def test_sweep_signals_matches_scalar_pipeline(self):
+        prices_a, prices_b = self.prices_a, self.prices_b
+        params, signals = self.strategy.sweep_signals(prices_a, prices_b, 1.5, [20, 40], [1.5, 2.0], [0.0, 0.5, 1.5])
+        # entry 1.5 / exit 1.5 is not a valid strategy and is skipped
+        self.assertEqual(len(params), 10)
+        self.assertEqual(signals.shape, (len(prices_a), 10))
+        for row in params.itertuples():
+            strategy = PairsTradingStrategy(row.lookback_period, row.entry_threshold, row.exit_threshold)
+            spread = strategy.calculate_spread(prices_a, prices_b, 1.5)
+            expected = strategy.generate_signals(strategy.calculate_zscore(spread))
+            np.testing.assert_array_equal(signals[row.Index].values, expected.values)
+
+    def test_generate_signals_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            self.strategy.generate_signals(self.zscore, engine='fortran')
+
+if __name__ == '__main__':
+    unittest.main()